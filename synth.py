@@ -12,17 +12,29 @@
 #
 
 from scipy.io import wavfile
+import scipy.fft
 import argparse
+import functools
+import hashlib
+import logging
 import numpy as np
 import pygame
 import warnings
 
 import threading
+from concurrent.futures import ProcessPoolExecutor
 import time
 import random
 import grovepi#, grove6axis as g6a
 import os, sys
 
+try:
+    import pyfftw
+    import pyfftw.interfaces.scipy_fft
+except ImportError:
+    # Stay on scipy's own pocketfft
+    pyfftw = None
+
 MELODY     = pygame.USEREVENT + 1
 DRONE_ON   = pygame.USEREVENT + 3
 DRONE_OFF  = pygame.USEREVENT + 4
@@ -35,52 +47,160 @@ US_MIN = 1
 
 CALIB_STEPS = 4
 
-LOCK = threading.Lock()
+# Pitch-shift window and hop sizes (see pitchshift)
+WINDOW_SIZE = 2**13
+HOP_SIZE = 2**11
+
+# Frames stretch transforms at once (bounds its memory use per call)
+FRAME_BLOCK = 16
+
+# Transposed notes from earlier runs, keyed by sample, number of notes and
+# pitch-shift settings. Bump TRANSPOSE_VERSION whenever stretch/pitchshift
+# change their output, so stale notes are not loaded.
+TRANSPOSE_CACHE = os.path.expanduser('~/.cache/synth')
+TRANSPOSE_VERSION = 1
+
+# Per-reading sensor and key messages; only formatted when --verbose
+log = logging.getLogger('synth')
+log.setLevel(logging.WARNING)
 
 
 
 def speedx(snd_array, factor):
     """ Speeds up / slows down a sound, by some factor. """
-    indices = np.round(np.arange(0, len(snd_array), factor))
-    indices = indices[indices < len(snd_array)].astype(int)
-    return snd_array[indices]
+    indices = np.rint(np.arange(0, len(snd_array), factor)).astype(np.intp)
+    # Indices only increase, so any rounded past the end are at the tail
+    indices = indices[:np.searchsorted(indices, len(snd_array))]
+    return np.take(snd_array, indices)
+
+@functools.lru_cache(maxsize=8)
+def hann(window_size):
+    """ Hann window of the given size, built once per size. """
+    return np.hanning(window_size).astype(np.float32)
+
+def accumulate_phase(s1, s2, phase):
+    """ Running phase of each frame of ``s2`` relative to ``s1``, carried on
+    from (and left in) ``phase``. """
+    phases = np.empty(s2.shape)
+    for k in range(s2.shape[0]):
+        # Angle of s2/s1, taken from the cross-spectrum s2*conj(s1), then
+        # wrapped to [0, 2*pi) in place
+        phase += np.angle(s2[k] * np.conj(s1[k]))
+        np.mod(phase, 2*np.pi, out=phase)
+        phases[k] = phase
+    return phases
 
 def stretch(snd_array, factor, window_size, h):
     """ Stretches/shortens a sound, by some factor. """
-    phase = np.zeros(window_size)
-    hanning_window = np.hanning(window_size)
-    result = np.zeros(int(len(snd_array) / factor + window_size))
-
-    for i in np.arange(0, len(snd_array) - (window_size + h), h*factor):
-        i = int(i)
-        # Two potentially overlapping subarrays
-        a1 = snd_array[i: i + window_size]
-        a2 = snd_array[i + h: i + window_size + h]
-
-        # The spectra of these arrays
-        s1 = np.fft.fft(hanning_window * a1)
-        s2 = np.fft.fft(hanning_window * a2)
-
-        # Rephase all frequencies
-        phase = (phase + np.angle(s2/s1)) % 2*np.pi
-
-        a2_rephased = np.fft.ifft(np.abs(s2)*np.exp(1j*phase))
-        i2 = int(i/factor)
-        result[i2: i2 + window_size] += hanning_window*a2_rephased.real
+    # Single precision throughout is plenty for 16bit audio, and halves the
+    # FFT work and memory traffic
+    snd_array = snd_array.astype(np.float32)
+    hanning_window = hann(window_size)
+    result = np.zeros(int(len(snd_array) / factor + window_size),
+                      dtype=np.float32)
+    phase = np.zeros(window_size//2 + 1)
+
+    # Integer start of every frame in the input and in the result
+    starts = np.arange(0, len(snd_array) - (window_size + h),
+                       h*factor).astype(np.int64)
+    out_starts = (starts / factor).astype(np.int64)
+
+    # Every window_size long subarray of the input, as a view (no copy). A
+    # sound too short for a single frame has none, and stays silent.
+    if len(starts) > 0:
+        windows = np.lib.stride_tricks.sliding_window_view(snd_array,
+                                                           window_size)
+
+    # Frames are transformed in fixed-size blocks, so memory use does not
+    # grow with the length of the sound
+    for b in range(0, len(starts), FRAME_BLOCK):
+        block = starts[b: b + FRAME_BLOCK]
+
+        # Two potentially overlapping subarrays per frame, one frame per row
+        # (gathered into fresh arrays, so they are windowed and transformed
+        # in place)
+        a1 = windows[block]
+        a2 = windows[block + h]
+        a1 *= hanning_window
+        a2 *= hanning_window
+
+        # The (one-sided) spectra of these real arrays, all frames of the
+        # block in one batched transform
+        s1 = scipy.fft.rfft(a1, axis=1, overwrite_x=True)
+        s2 = scipy.fft.rfft(a2, axis=1, overwrite_x=True)
+
+        # Rephase all frequencies (accumulated from frame to frame)
+        phases = accumulate_phase(s1, s2, phase)
+
+        # |s2|*exp(1j*phases) as cos/sin written straight into s2, which is
+        # not needed once its magnitude is taken
+        mag = np.abs(s2)
+        np.cos(phases, out=s2.real)
+        np.sin(phases, out=s2.imag)
+        s2.real *= mag
+        s2.imag *= mag
+
+        # Window all frames at once in place, then overlap-add them
+        a2_rephased = scipy.fft.irfft(s2, n=window_size, axis=1,
+                                      overwrite_x=True)
+        a2_rephased *= hanning_window
+        for i2, a2_r in zip(out_starts[b: b + FRAME_BLOCK], a2_rephased):
+            result[i2: i2 + window_size] += a2_r
 
     # normalize (16bit)
     result = ((2**(16-4)) * result/result.max())
 
     return result.astype('int16')
 
-def pitchshift(snd_array, n, window_size=2**13, h=2**11):
+def pitchshift(snd_array, n, window_size=WINDOW_SIZE, h=HOP_SIZE):
     """ Changes the pitch of a sound by ``n`` semitones. """
     sys.stdout.write(".")
     sys.stdout.flush()
     factor = 2**(1.0 * n / 12.0)
+    # Round up to a length the real FFT handles quickly (2**13 already is)
+    window_size = scipy.fft.next_fast_len(window_size, real=True)
     stretched = stretch(snd_array, 1.0/factor, window_size, h)
     return speedx(stretched[window_size:], factor)
 
+def use_fftw():
+    """ Routes scipy.fft through FFTW, if available. """
+    if pyfftw is None:
+        scipy.fft.set_global_backend('scipy')
+        return
+    pyfftw.interfaces.cache.enable()
+    pyfftw.interfaces.cache.set_keepalive_time(60)
+    # Measuring plans took ~7x as long as a whole transpose, and the
+    # measured plans were no faster than estimated ones
+    pyfftw.config.PLANNER_EFFORT = 'FFTW_ESTIMATE'
+    scipy.fft.set_global_backend(pyfftw.interfaces.scipy_fft)
+
+def transpose_cache_path(snd_array, notes):
+    """ Where the notes transposed from this sample are cached. """
+    settings = '%d:%d:%d:%d' % (TRANSPOSE_VERSION, notes, WINDOW_SIZE, HOP_SIZE)
+    key = hashlib.sha1(snd_array.tobytes() + settings.encode()).hexdigest()
+    return os.path.join(TRANSPOSE_CACHE, key + '.npz')
+
+def load_transposed(path, notes):
+    """ Transposed notes saved by save_transposed(), or None if there are
+    none (or the entry can't be read, e.g. truncated by a power cut). """
+    try:
+        with np.load(path) as arrs:
+            return [arrs['a%d' % i] for i in range(notes)]
+    except Exception:
+        return None
+
+def save_transposed(path, transposed_sounds):
+    """ Saves transposed notes, if possible (the cache is only a speed-up,
+    so failing to write it is not fatal). """
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            np.savez(f, **{'a%d' % i: a
+                           for (i, a) in enumerate(transposed_sounds)})
+        os.replace(path + '.tmp', path)
+    except OSError as e:
+        log.warning("Could not cache transposed notes in %s: %s", path, e)
+
 
 def parse_arguments():
     description = ("RPI + GrovePi synth (adapted from pianoputer)")
@@ -160,64 +280,50 @@ class lcontrol(threading.Thread):
             time.sleep(self.res)
 '''
 
-class dronecontrol(threading.Thread):
-    kill = 0
+class dronecontrol:
     pval = 0
+    pvalf = 0
 
     def __init__(self, pin, ledpin, res=0.1):
-        threading.Thread.__init__(self)
         self.pin = pin
         self.ledpin = ledpin
+        self.res = res
     
     def setres(self, res):
         self.res = res
 
-    def kill(self):
-        self.kill = 1
-    
-    def run(self):
-        print("Starting drone control thread")
+    def poll(self):
         const = 0.1
-        pvalf = 0
-        while self.kill != 1:
-            LOCK.acquire()
-            pval = grovepi.digitalRead(self.pin)
-            LOCK.release()
-            pvalf = pvalf * (1.0-const) + pval * const
-            if self.pval == 0 and pval == 1:
-                pygame.event.post(pygame.event.Event(DRONE_ON))
-                self.pval = pval
-                print("DRONE triggered        [filtered value (>=0.4): ",pvalf,"]")
-                LOCK.acquire()
-                grovepi.digitalWrite(self.ledpin, 1)
-                LOCK.release()
-            elif self.pval == 1 and pval == 0 and pvalf < 0.4:
-                pygame.event.post(pygame.event.Event(DRONE_OFF))
-                self.pval = pval
-                print("DRONE off              [filtered value (<0.4): ",pvalf,"]")
-                LOCK.acquire()
-                grovepi.digitalWrite(self.ledpin, 0)
-                LOCK.release()
-            time.sleep(self.res)
-
-class drumcontrol(threading.Thread): # CURRENTLY ONLY 2 LDRs MAX
-    kill = 0
+        pval = grovepi.digitalRead(self.pin)
+        self.pvalf = self.pvalf * (1.0-const) + pval * const
+        if self.pval == 0 and pval == 1:
+            pygame.event.post(pygame.event.Event(DRONE_ON))
+            self.pval = pval
+            log.debug("DRONE triggered        [filtered value (>=0.4): %s]",
+                      self.pvalf)
+            grovepi.digitalWrite(self.ledpin, 1)
+        elif self.pval == 1 and pval == 0 and self.pvalf < 0.4:
+            pygame.event.post(pygame.event.Event(DRONE_OFF))
+            self.pval = pval
+            log.debug("DRONE off              [filtered value (<0.4): %s]",
+                      self.pvalf)
+            grovepi.digitalWrite(self.ledpin, 0)
+
+class drumcontrol: # CURRENTLY ONLY 2 LDRs MAX
     l1val = 0
     l2val = 0
     lcalib = [] # Store tuples of (max-light-value, delta) for each ldr
     
     def __init__(self, ldrpins, ledpins, res=0.1):
-        threading.Thread.__init__(self)
         self.ledpins = ledpins
         self.ldrpins = ldrpins
+        self.res = res
         # Light calibration
-        LOCK.acquire()
         for pin in ldrpins:
             #lcalib.append((1000, 500))
             self.lcalib.append(self.calibldr(pin, 1, 750))
             print("CALIBRATED LDR(", pin, "): lmax, delta = ", 
                     self.lcalib[-1][0], self.lcalib[-1][1])
-        LOCK.release()
 
     def calibldr(self, pin, lmin, lmax):
         ls = []
@@ -236,56 +342,39 @@ class drumcontrol(threading.Thread): # CURRENTLY ONLY 2 LDRs MAX
     def setres(self, res):
         self.res = res
 
-    def kill(self):
-        self.kill = 1
-    
-    def run(self):
-        print("Starting drum control thread")
-        while self.kill != 1:
-            
-            # LDR kick and snare
-            LOCK.acquire()
-            l1val_ = grovepi.analogRead(self.ldrpins[0])
-            l2val_ = grovepi.analogRead(self.ldrpins[1])
-            LOCK.release()
-
-            #print ("l1val = ", l1val_, " l2val = ", l2val_)
-            if l1val_ < self.lcalib[0][0] and l1val_ > self.l1val:
-                self.l1val = l1val_
-            elif self.l1val - l1val_ > self.lcalib[0][1]:
-                pygame.event.post(pygame.event.Event(KICK))
-                LOCK.acquire()
-                grovepi.digitalWrite(self.ledpins[1], 1)
-                LOCK.release()
-                print("KICK triggered by LDR  [value: ",
-                        l1val_, "; delta: ", self.l1val-l1val_, "]")
-                self.l1val = l1val_
-
-            if l2val_ < self.lcalib[1][0] and l2val_ > self.l2val:
-                self.l2val = l2val_
-            elif self.l2val - l2val_ > self.lcalib[1][1]:
-                pygame.event.post(pygame.event.Event(SNARE))
-                LOCK.acquire()
-                grovepi.digitalWrite(self.ledpins[0], 1)
-                LOCK.release()
-                print("SNARE triggered by LDR [value: ",
-                        l2val_, "; delta: ", self.l2val-l2val_, "]")
-                self.l2val = l2val_
-
-            time.sleep(self.res)
-
-            LOCK.acquire()
-            for pin in self.ledpins:
-                grovepi.digitalWrite(pin, 0)
-            LOCK.release()
-
-
-class mldycontrol(threading.Thread):
+    def poll(self):
+        # LEDs lit by the previous poll stay on for one period
+        for pin in self.ledpins:
+            grovepi.digitalWrite(pin, 0)
+
+        # LDR kick and snare
+        l1val_ = grovepi.analogRead(self.ldrpins[0])
+        l2val_ = grovepi.analogRead(self.ldrpins[1])
+
+        #print ("l1val = ", l1val_, " l2val = ", l2val_)
+        if l1val_ < self.lcalib[0][0] and l1val_ > self.l1val:
+            self.l1val = l1val_
+        elif self.l1val - l1val_ > self.lcalib[0][1]:
+            pygame.event.post(pygame.event.Event(KICK))
+            grovepi.digitalWrite(self.ledpins[1], 1)
+            log.debug("KICK triggered by LDR  [value: %s; delta: %s]",
+                      l1val_, self.l1val-l1val_)
+            self.l1val = l1val_
+
+        if l2val_ < self.lcalib[1][0] and l2val_ > self.l2val:
+            self.l2val = l2val_
+        elif self.l2val - l2val_ > self.lcalib[1][1]:
+            pygame.event.post(pygame.event.Event(SNARE))
+            grovepi.digitalWrite(self.ledpins[0], 1)
+            log.debug("SNARE triggered by LDR [value: %s; delta: %s]",
+                      l2val_, self.l2val-l2val_)
+            self.l2val = l2val_
+
+
+class mldycontrol:
     uval = 0
-    kill = 0
 
     def __init__(self, pin=3, res=0.5, notes=10):
-        threading.Thread.__init__(self)
         self.res = res
         self.notes = notes
         self.pin = pin
@@ -299,34 +388,54 @@ class mldycontrol(threading.Thread):
     def getuval(self):
         return self.uval
 
-    def run(self):
-        print("Starting melody control thread")
-        while self.kill != 1:
-            
-            '''
-            g = g6a.getAccel()
-            mag = sum(g) / len(g)
-            
-            '''
-           
-            LOCK.acquire()
-            uval = grovepi.ultrasonicRead(self.pin)
-            LOCK.release()
-
-            if uval < US_MAX and uval >= US_MIN:
-                uval_ = int(((uval * (self.notes - 1)) / (US_MAX - US_MIN)) + 1)
-                print("MELODY note ",uval_, "       [raw value: ",uval,"]")
-                if uval_ != self.uval:
-                    self.uval = uval_
-                    pygame.event.post(pygame.event.Event(MELODY, message=str(self.uval)))
-            time.sleep(self.res)
+    def poll(self):
+        #g = g6a.getAccel()
+        #mag = sum(g) / len(g)
+
+        uval = grovepi.ultrasonicRead(self.pin)
+
+        if uval < US_MAX and uval >= US_MIN:
+            uval_ = int(((uval * (self.notes - 1)) / (US_MAX - US_MIN)) + 1)
+            log.debug("MELODY note %s       [raw value: %s]", uval_, uval)
+            if uval_ != self.uval:
+                self.uval = uval_
+                pygame.event.post(pygame.event.Event(MELODY, message=str(self.uval)))
 
-    def kill(self):
-        self.kill = 1
 
+class sensorcontrol(threading.Thread):
+    """ Polls all sensor controls from one thread (and so one I2C user).
 
+    Each control is polled every ``control.res`` seconds against its own
+    deadline, so time spent inside the reads (an ultrasonic read alone
+    blocks for 60ms) does not stretch the period. A control whose reads
+    take longer than its period is polled as often as it can be. """
+    kill = 0
+
+    def __init__(self, controls):
+        threading.Thread.__init__(self)
+        self.controls = controls
+        self.stopped = threading.Event() # Set once polling has ended
 
-def main(threads):
+    def kill(self):
+        self.kill = 1
+
+    def run(self):
+        print("Starting sensor control thread")
+        due = [time.monotonic()] * len(self.controls)
+        try:
+            while self.kill != 1:
+                for i, control in enumerate(self.controls):
+                    now = time.monotonic()
+                    if now >= due[i]:
+                        control.poll()
+                        # Don't build up a backlog of missed polls
+                        due[i] = max(due[i] + control.res, now)
+                time.sleep(max(0, min(due) - time.monotonic()))
+        finally:
+            self.stopped.set()
+
+
+def main(sensorthread, controls):
     # Parse command line arguments
     (args, parser) = parse_arguments()
 
@@ -334,11 +443,16 @@ def main(threads):
     if not args.verbose:
         warnings.simplefilter('ignore')
 
+    # Log sensor and key triggers if requested
+    logging.basicConfig(format='%(message)s')
+    if args.verbose:
+        log.setLevel(logging.DEBUG)
+
     # Headless
     #os.putenv('SDL_VIDEODRIVER', 'fbcon')
     os.environ["SDL_VIDEODRIVER"] = "dummy"
+    # The event queue needs the video subsystem, but not a window
     pygame.display.init()
-    screen = pygame.display.set_mode((500, 400))
 
     fps, sound = wavfile.read(args.wavmldy.name)
     pygame.mixer.pre_init(fps, -16, 1, 2048)
@@ -354,54 +468,72 @@ def main(threads):
 
     
     tones = range(-int(np.floor(args.notes/2)), int(np.ceil(args.notes/2)))
-    print("Transposing sound to create ", args.notes, " notes")
-    transposed_sounds = [pitchshift(sound, n) for n in tones]
-    print("Done")
+    cache_path = transpose_cache_path(sound, args.notes)
+    transposed_sounds = load_transposed(cache_path, args.notes)
+    if transposed_sounds is not None:
+        print("Loaded ", args.notes, " transposed notes from ", cache_path)
+    else:
+        print("Transposing sound to create ", args.notes, " notes")
+        # FFTW if available, else pocketfft. stretch transforms in blocks
+        # of FRAME_BLOCK frames, so all but each sound's last block reuse
+        # one cached plan. Semitones are shifted in parallel, one per core,
+        # so each worker process keeps to a single FFT thread.
+        with ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                 initializer=use_fftw) as ex:
+            transposed_sounds = list(ex.map(
+                functools.partial(pitchshift, sound), tones))
+        save_transposed(cache_path, transposed_sounds)
+        print("Done")
 
     keys = args.keyboard.read().split('\n')
-    sounds = map(pygame.sndarray.make_sound, transposed_sounds)
+    # Build every Sound up front, so no note pays for it on first play
+    sounds = [pygame.sndarray.make_sound(np.ascontiguousarray(t))
+              for t in transposed_sounds]
     key_sound = dict(zip(keys, sounds))
-    is_playing = {k: False for k in keys}
+    playing = set() # Keys held down on the keyboard
 
 
 
-    mldythread = threads['mldythread']
-    dronethread = threads['dronethread']
-    drumthread = threads['drumthread']
+    mldyctl = controls['mldycontrol']
+    dronectl = controls['dronecontrol']
+    drumctl = controls['drumcontrol']
 
 
 
-    mldythread.setres(0.05)
-    mldythread.setnotes(args.notes)
-    mldythread.start()
+    mldyctl.setres(0.05)
+    mldyctl.setnotes(args.notes)
     
-    dronethread.setres(0.2)
-    dronethread.start()
+    dronectl.setres(0.2)
     
-    drumthread.setres(0.1)
-    drumthread.start()
+    drumctl.setres(0.1)
+
+    sensorthread.start()
 
     keyVal = None
 
-    while mldythread.isAlive():
+    # Wake up every 100ms so the loop ends if the sensor thread does
+    while not sensorthread.stopped.is_set():
 
-        event = pygame.event.wait()
+        event = pygame.event.wait(100)
+        if event.type == pygame.NOEVENT:
+            continue
         
         if event.type in (pygame.KEYDOWN, pygame.KEYUP):
             keyVal = pygame.key.name(event.key)
         elif event.type == MELODY:
             keyVal = event.message
+        snd = key_sound.get(keyVal)
 
         if event.type == MELODY:
-            if (keyVal in key_sound.keys()) and (not is_playing[keyVal]):
-                key_sound[keyVal].play(fade_ms=50)
-                #is_playing[keyVal] = True
+            if snd is not None and keyVal not in playing:
+                snd.play(fade_ms=50)
+                #playing.add(keyVal)
         '''        
-        if event.type == MELODY_OFF and keyVal in key_sound.keys():
+        if event.type == MELODY_OFF and snd is not None:
             print("Sensor turning off key value ", keyVal)
             # Stops with 50ms fadeout
-            key_sound[keyVal].fadeout(50)
-            is_playing[keyVal] = False
+            snd.fadeout(50)
+            playing.discard(keyVal)
         '''
         
         if event.type == DRONE_ON:
@@ -426,19 +558,19 @@ def main(threads):
 
         # Pianoputer keyboard triggers
         if event.type == pygame.KEYDOWN:
-            print("KEYDOWN")
-            if (keyVal in key_sound.keys()) and (not is_playing[keyVal]):
-                key_sound[keyVal].play(fade_ms=50)
-                is_playing[keyVal] = True
-                print("Keyboard playing key value ", keyVal)
+            log.debug("KEYDOWN")
+            if snd is not None and keyVal not in playing:
+                snd.play(fade_ms=50)
+                playing.add(keyVal)
+                log.debug("Keyboard playing key value %s", keyVal)
             elif event.key == pygame.K_ESCAPE:
                 pygame.quit()
                 raise KeyboardInterrupt
-        elif event.type == pygame.KEYUP and keyVal in key_sound.keys():
-            print("KEYUP")
+        elif event.type == pygame.KEYUP and snd is not None:
+            log.debug("KEYUP")
             # Stops with 50ms fadeout
-            key_sound[keyVal].fadeout(50)
-            is_playing[keyVal] = False
+            snd.fadeout(50)
+            playing.discard(keyVal)
         
 
 
@@ -464,19 +596,19 @@ if __name__ == '__main__':
                 DRONE_PIR_PIN]:
         grovepi.pinMode(pin, "INPUT")
 
-    mldythread = mldycontrol(MELODY_ULTRASONIC_PIN)
-    dronethread = dronecontrol(DRONE_PIR_PIN, DRONE_LED_PIN)
-    drumthread = drumcontrol(ldrpins=(KICK_LDR_PIN, SNARE_LDR_PIN),
-                             ledpins=(KICK_LED_PIN, SNARE_LED_PIN))
+    mldyctl = mldycontrol(MELODY_ULTRASONIC_PIN)
+    dronectl = dronecontrol(DRONE_PIR_PIN, DRONE_LED_PIN)
+    drumctl = drumcontrol(ldrpins=(KICK_LDR_PIN, SNARE_LDR_PIN),
+                          ledpins=(KICK_LED_PIN, SNARE_LED_PIN))
+    sensorthread = sensorcontrol([mldyctl, dronectl, drumctl])
 
     try:
-        main({'mldythread' : mldythread, 
-              'dronethread' : dronethread, 
-              'drumthread' : drumthread})
+        main(sensorthread,
+             {'mldycontrol' : mldyctl, 
+              'dronecontrol' : dronectl, 
+              'drumcontrol' : drumctl})
     except (KeyboardInterrupt, SystemExit):
         print("Quitting...")
-        mldythread.kill()
-        dronethread.kill()
-        drumthread.kill()
+        sensorthread.kill()
         sys.exit()
 